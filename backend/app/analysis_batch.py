@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, List
+
+from sqlalchemy.orm import undefer_group
+
+from .analysis_service import (
+    AnalysisBatchError,
+    fetch_analysis_batch,
+    get_openai_client,
+    submit_analysis_batch,
+)
+from .database import SessionLocal
+from .models import CONTENT_GROUP, TrainingSession
+from .schemas import ConversationAnalysis
+from .session_counts import forget_counts
+from .settings import settings
+
+
+# Sessions whose transcript is stored but whose analysis is waiting for a batch.
+ANALYZING_STATUS = "analyzing"
+
+logger = logging.getLogger("moonai.analysis.batch")
+
+
+def _load_pending_sessions(exclude: set[int]) -> List[tuple[str, str, str]]:
+    db = SessionLocal()
+    try:
+        sessions = (
+            db.query(TrainingSession)
+            .options(undefer_group(CONTENT_GROUP))
+            .filter(TrainingSession.status == ANALYZING_STATUS)
+            .all()
+        )
+        return [
+            (str(session.id), session.session_system_prompt or "", session.conversation_log or "")
+            for session in sessions
+            if session.id not in exclude
+        ]
+    finally:
+        db.close()
+
+
+def _store_batch_results(
+    session_ids: List[int],
+    results: Dict[str, tuple[ConversationAnalysis, str] | Exception],
+) -> set[int]:
+    """Store the results and return the ids of the users whose sessions changed."""
+    user_ids: set[int] = set()
+    db = SessionLocal()
+    try:
+        for session_id in session_ids:
+            session = db.get(TrainingSession, session_id)
+            if session is None or session.status != ANALYZING_STATUS:
+                continue
+
+            result = results.get(str(session_id))
+            if isinstance(result, tuple):
+                analysis, raw_payload = result
+                session.ai_analysis = raw_payload
+                session.score = analysis.score
+                session.feedback = analysis.specific_feedback
+            else:
+                error = result or AnalysisBatchError("No result returned for this session")
+                logger.error("Batch analysis failed for session %s: %s", session_id, error)
+                session.ai_analysis = f"Analysis failed: {str(error)}"
+                session.score = None
+                session.feedback = "Analysis service unavailable. Please try again later."
+            session.status = "completed"
+            user_ids.add(session.user_id)
+        db.commit()
+        return user_ids
+    finally:
+        db.close()
+
+
+async def _process_batches(in_flight: Dict[str, List[int]]) -> None:
+    client = get_openai_client()
+
+    for batch_id, session_ids in list(in_flight.items()):
+        try:
+            results = await fetch_analysis_batch(client=client, batch_id=batch_id)
+        except AnalysisBatchError as exc:
+            logger.error("%s", exc)
+            results = {}
+        if results is None:
+            continue
+        user_ids = await asyncio.to_thread(_store_batch_results, session_ids, results)
+        # Status-filtered history totals change with every completed session.
+        for user_id in user_ids:
+            forget_counts(user_id)
+        del in_flight[batch_id]
+        logger.info("Stored results of analysis batch %s", batch_id)
+
+    submitted = {session_id for ids in in_flight.values() for session_id in ids}
+    pending = await asyncio.to_thread(_load_pending_sessions, submitted)
+    if pending:
+        batch_id = await submit_analysis_batch(client=client, entries=pending)
+        in_flight[batch_id] = [int(custom_id) for custom_id, _, _ in pending]
+
+
+async def run_analysis_batch_worker() -> None:
+    """
+    Periodically submit sessions waiting for analysis and collect finished batches.
+
+    Batches are tracked in memory; after a restart, sessions still marked as
+    analyzing are simply submitted again.
+    """
+    in_flight: Dict[str, List[int]] = {}
+    logger.info("Analysis batch worker started (poll interval %.0fs)", settings.analysis_batch_poll_interval)
+    while True:
+        try:
+            await _process_batches(in_flight)
+        except Exception:
+            logger.exception("Analysis batch worker iteration failed")
+        await asyncio.sleep(settings.analysis_batch_poll_interval)
@@ -1,81 +1,705 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-import os
-from typing import Tuple
+import time
+from textwrap import dedent
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, Tuple
 
-from dotenv import load_dotenv
-from openai import OpenAI
+import httpx
+import orjson
+from pydantic_core import from_json
+from sqlalchemy import delete
 
+from .database import SessionLocal
+from .models import AnalysisCacheEntry
 from .schemas import ConversationAnalysis
+from .settings import settings
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+logger = logging.getLogger("moonai.analysis")
 
+# Analyses that share a session prompt and arrive within the window are sent as
+# one request of up to settings.analysis_coalesce_max_batch transcripts.
+ANALYSIS_COALESCE_WINDOW_SECONDS = 0.2
+ANALYSIS_COALESCE_MAX_TOKENS = 4096
 
-def _build_analysis_prompt(system_prompt: str, conversation_log: str) -> list[dict[str, str]]:
-    analysis_instructions = f"""
-    You are an AI sales coach reviewing a manager's practice call with a simulated business client.
-    Follow the template from the system prompt provided during the session to score and provide feedback.
-    """.strip()
 
-    return [
+# Static coaching instructions sent as the very first message of every
+# analysis request. OpenAI caches identical prompt prefixes of 1024+ tokens, so
+# this block must stay byte-for-byte stable and long enough to cross that
+# threshold; anything per-session goes after it.
+_COACH_SYSTEM_PROMPT = dedent(
+    """
+    You are an experienced AI sales coach. You review recordings of practice
+    calls between a sales manager and a simulated business client (a company
+    director played by a voice agent) and give the manager honest, specific and
+    actionable feedback.
+
+    How the material is organised:
+    - The next system message is the prompt the voice agent was given for this
+      session. It describes the product, the client persona, the difficulty
+      level and, usually, a scoring template. When that prompt contains a
+      scoring template or evaluation criteria, follow it: it takes priority over
+      the general rubric below.
+    - The user message contains the full transcript of the call. Lines are
+      attributed to the manager ("user") and to the simulated client ("agent").
+      Treat the transcript as the only source of truth about what happened.
+      Never invent statements that are not in the transcript.
+
+    What to evaluate (use these areas unless the session prompt defines its
+    own criteria):
+    1. Opening. Did the manager introduce themselves and the company, state the
+       purpose of the call and earn the right to continue? Did they adapt to the
+       client's mood in the first replies?
+    2. Needs discovery. Did the manager ask open questions about the client's
+       business, current process, pains and goals before pitching? Did they
+       listen and build on the answers instead of following a script blindly?
+    3. Value proposition. Did the manager connect the product to the needs the
+       client actually voiced, using concrete benefits, numbers, examples or
+       cases rather than generic claims?
+    4. Objection handling. When the client pushed back (price, time, trust,
+       "send me a proposal", "we already have a vendor"), did the manager
+       acknowledge the concern, clarify it and answer it with substance, or did
+       they argue, ignore it or give up?
+    5. Tone and control of the conversation. Was the manager polite, confident
+       and concise? Did they keep the dialogue on track with a difficult,
+       indifferent or aggressive client without becoming defensive?
+    6. Closing and next steps. Did the manager propose a clear next step (a
+       meeting, a demo, a trial, a follow-up call with a date) and get an
+       explicit answer from the client?
+
+    Scoring scale (0 to 10, decimals allowed):
+    - 0-2: the call barely happened or the manager lost the client immediately;
+      no discovery, no value, no next step.
+    - 3-4: the manager pitched without understanding the client, handled
+      objections poorly and ended without a commitment.
+    - 5-6: the basics are present but shallow; some discovery and some value,
+      objections only partly handled, a vague next step.
+    - 7-8: solid call; needs were uncovered, value was tied to them, most
+      objections were handled and a concrete next step was agreed.
+    - 9-10: exemplary call that would work with a real client of this type;
+      reserve these scores for genuinely excellent work.
+    Take the difficulty level and the client type into account: holding an
+    aggressive or indifferent client on the line and reaching a next step is
+    worth more than doing the same with a friendly one. A very short or
+    unfinished transcript cannot score above 3.
+
+    What a good manager does with each client type:
+    - Friendly: uses the warm start to dig into needs instead of chatting, and
+      still asks for a concrete commitment at the end.
+    - Sceptic: backs every claim with numbers, cases or references, admits
+      limitations honestly and offers a low-risk way to check the product.
+    - Aggressive: stays calm, answers briefly, gets to the point quickly and
+      does not take the bait or start justifying themselves.
+    - Indifferent: finds a hook with a sharp question about the client's
+      business, keeps answers short and makes the next step easy to accept.
+    - Enthusiast: channels the interest into specifics and addresses the worry
+      about cost, time and resources before it turns into a "no".
+    - Rational: structures the conversation, talks about ROI, timelines,
+      resources and guarantees, and avoids emotional arguments.
+    - Passive-aggressive: ignores the sarcasm, stays polite and factual and
+      keeps steering towards value and a next step.
+
+    Common mistakes to call out when they happen: talking much more than the
+    client, pitching features before understanding the need, answering a
+    question that was not asked, agreeing to "just send a proposal" without
+    qualifying interest, discounting the price too early, interrupting the
+    client, and ending the call without a date or an owner for the next step.
+
+    How to write the feedback:
+    - Write in the same language as the transcript (usually Russian).
+    - Be specific: refer to what was actually said, quote short phrases when
+      useful, and explain why a moment helped or hurt the call.
+    - Every area for improvement must include a concrete suggestion of what to
+      say or do differently next time.
+    - Keep each list item to one or two sentences. Do not repeat the same point
+      in several lists.
+    - Key moments are turning points of the call: a strong question, a missed
+      buying signal, a badly handled objection, the close. List them in the
+      order they happened.
+
+    Output format. Respond with a single JSON object and nothing else, with
+    exactly these keys:
+    - "score": number from 0 to 10.
+    - "strengths": list of strings, what the manager did well.
+    - "areas_for_improvement": list of strings, what to improve and how.
+    - "specific_feedback": string, a short paragraph with the overall verdict
+      and the single most important recommendation.
+    - "key_moments": list of strings, the turning points of the call.
+    Do not wrap the JSON in markdown and do not add comments or extra keys.
+    """
+).strip()
+
+
+# Sent only with coalesced requests, after the shared prefix so that prefix stays
+# cacheable. It overrides the single-transcript wording of the coach prompt.
+_COALESCED_SYSTEM_PROMPT = dedent(
+    """
+    This request contains several independent calls instead of one. The user
+    message holds a number of transcripts, each introduced by a "## id=<n>"
+    heading. They are different calls, usually by different managers, and have
+    nothing to do with each other. Analyse every transcript in isolation, as if
+    it were the only one in the request: each transcript is the only source of
+    truth about its own call, and nothing said, done or scored in one
+    transcript may appear in or influence the analysis of another. Return one
+    result per transcript in "results", with the same "id" as its heading and
+    the keys described above.
+    """
+).strip()
+
+
+def _build_analysis_prompt(system_prompt: str, conversation_log: str) -> list[dict[str, str]]:
+    messages = [{"role": "system", "content": _COACH_SYSTEM_PROMPT}]
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append(
         {
-            "role": "system",
-            "content": system_prompt,
+            "role": "user",
+            "content": f"Conversation transcript:\n{conversation_log}",
+        }
+    )
+    return messages
+
+
+def _prompt_cache_key(system_prompt: str) -> str:
+    # Requests sharing a session prompt share the longest cacheable prefix, so
+    # route them together.
+    return "analysis-" + hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+# Strict structured output: the model can only emit a valid ConversationAnalysis,
+# so the key list no longer has to be repeated in every user message.
+_ANALYSIS_SCHEMA: Dict[str, Any] = {
+    **ConversationAnalysis.model_json_schema(),
+    "additionalProperties": False,
+}
+_ANALYSIS_RESPONSE_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {"name": "conversation_analysis", "schema": _ANALYSIS_SCHEMA, "strict": True},
+}
+_ANALYSIS_RESULTS_RESPONSE_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "conversation_analyses",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        **_ANALYSIS_SCHEMA,
+                        "properties": {
+                            "id": {"type": "integer"},
+                            **_ANALYSIS_SCHEMA["properties"],
+                        },
+                        "required": ["id", *_ANALYSIS_SCHEMA["required"]],
+                    },
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False,
         },
+        "strict": True,
+    },
+}
+
+
+def _completion_params(session_system_prompt: str, conversation_log: str) -> Dict[str, Any]:
+    return {
+        "model": settings.openai_model,
+        "messages": _build_analysis_prompt(
+            system_prompt=session_system_prompt, conversation_log=conversation_log
+        ),
+        "temperature": 0.2,
+        "response_format": _ANALYSIS_RESPONSE_FORMAT,
+        "max_completion_tokens": settings.analysis_max_completion_tokens,
+        "prompt_cache_key": _prompt_cache_key(session_system_prompt),
+    }
+
+
+def _parse_analysis(content: str) -> ConversationAnalysis:
+    try:
+        return ConversationAnalysis.model_validate_json(content)
+    except Exception as validation_error:
+        logger.error(
+            "Failed to validate OpenAI response: %s. Content: %s",
+            validation_error,
+            content[:500]
+        )
+        raise ValueError(f"Invalid analysis response format: {validation_error}") from validation_error
+
+
+def _analysis_cache_key(session_system_prompt: str, conversation_log: str) -> str:
+    digest = hashlib.sha256()
+    for part in (settings.openai_model, _COACH_SYSTEM_PROMPT, session_system_prompt, conversation_log):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def _load_cached_analysis(key: str) -> str | None:
+    db = SessionLocal()
+    try:
+        entry = db.get(AnalysisCacheEntry, key)
+        if entry is None or entry.created_at < time.time() - settings.analysis_cache_ttl_seconds:
+            return None
+        return entry.response_json
+    finally:
+        db.close()
+
+
+def _store_cached_analysis(key: str, content: str) -> None:
+    now = time.time()
+    db = SessionLocal()
+    try:
+        db.merge(AnalysisCacheEntry(key=key, response_json=content, created_at=now))
+        # Expired entries are never read again; drop them as new ones arrive.
+        db.execute(
+            delete(AnalysisCacheEntry).where(
+                AnalysisCacheEntry.created_at < now - settings.analysis_cache_ttl_seconds
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _cached_analysis(key: str) -> Tuple[ConversationAnalysis, str] | None:
+    if settings.analysis_cache_ttl_seconds <= 0:
+        return None
+    try:
+        content = await asyncio.to_thread(_load_cached_analysis, key)
+        if content is None:
+            return None
+        logger.info("Analysis cache hit: %s", key[:12])
+        return _parse_analysis(content), content
+    except Exception as exc:
+        logger.warning("Analysis cache lookup failed: %s", exc)
+        return None
+
+
+async def _cache_analysis(key: str, content: str) -> None:
+    if settings.analysis_cache_ttl_seconds <= 0:
+        return
+    try:
+        await asyncio.to_thread(_store_cached_analysis, key, content)
+    except Exception as exc:
+        logger.warning("Failed to store analysis in cache: %s", exc)
+
+
+async def _completion_content(client: AsyncOpenAI, params: Dict[str, Any]) -> str:
+    raw = await client.chat.completions.with_raw_response.create(**params)
+    # Decode the HTTP body once with orjson rather than building the SDK's
+    # response models only to read a single string out of them.
+    body = orjson.loads(raw.content)
+    return body["choices"][0]["message"]["content"] or "{}"
+
+
+async def _request_analysis(
+    client: AsyncOpenAI,
+    session_system_prompt: str,
+    conversation_log: str,
+) -> Tuple[ConversationAnalysis, str]:
+    content = await _completion_content(
+        client, _completion_params(session_system_prompt, conversation_log)
+    )
+    logger.debug("OpenAI response content length: %d", len(content))
+
+    return _parse_analysis(content), content
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough upper bound that avoids pulling in a tokenizer.
+    return len(text) // 3 + 1
+
+
+async def _request_analyses(
+    client: AsyncOpenAI,
+    session_system_prompt: str,
+    conversation_logs: list[str],
+) -> list[Tuple[ConversationAnalysis, str]]:
+    """Analyse several transcripts that share a session prompt in a single request."""
+    transcripts = "\n\n".join(
+        f"## id={index}\n{conversation_log}"
+        for index, conversation_log in enumerate(conversation_logs, start=1)
+    )
+    params = _completion_params(session_system_prompt, "")
+    params["messages"][-1:] = [
+        {"role": "system", "content": _COALESCED_SYSTEM_PROMPT},
         {
             "role": "user",
             "content": (
-                f"Conversation transcript:\n{conversation_log}\n\n"
-                f"Provide a JSON object with keys: score (0-10 number), strengths (list of strings),"
-                f" areas_for_improvement (list of strings), specific_feedback (string),"
-                f" key_moments (list of strings)."
+                f"Analyze the following {len(conversation_logs)} conversation transcripts independently"
+                f" and return one result per transcript, with its id.\n\n{transcripts}"
             ),
         },
     ]
+    params["response_format"] = _ANALYSIS_RESULTS_RESPONSE_FORMAT
+    params["max_completion_tokens"] = settings.analysis_max_completion_tokens * len(conversation_logs)
+    content = await _completion_content(client, params)
+
+    by_id = {item.pop("id", None): item for item in orjson.loads(content).get("results", [])}
+    results = []
+    for index in range(1, len(conversation_logs) + 1):
+        item = by_id.get(index, by_id.get(str(index)))
+        if item is None:
+            raise ValueError(f"Invalid analysis response format: missing result for transcript {index}")
+        raw = orjson.dumps(item).decode("utf-8")
+        results.append((_parse_analysis(raw), raw))
+    return results
+
 
+class _AnalysisCoalescer:
+    """Collects concurrent analysis requests and sends them to OpenAI in groups."""
 
-def analyse_conversation(
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # The loop only keeps weak references to tasks; these keep ours alive.
+        self._runner: asyncio.Task | None = None
+        self._dispatches: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        client: AsyncOpenAI,
+        session_system_prompt: str,
+        conversation_log: str,
+    ) -> Tuple[ConversationAnalysis, str]:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            queue: asyncio.Queue = asyncio.Queue()
+            self._queue = queue
+            self._loop = loop
+            self._runner = loop.create_task(self._run(queue))
+            self._runner.add_done_callback(lambda task: self._runner_done(task, queue))
+        future = loop.create_future()
+        await self._queue.put((client, session_system_prompt, conversation_log, future))
+        return await future
+
+    def _runner_done(self, task: asyncio.Task, queue: asyncio.Queue) -> None:
+        # The next submit starts a fresh runner; whatever is still queued would
+        # otherwise wait forever.
+        if self._queue is queue:
+            self._queue = None
+            self._runner = None
+        stranded = []
+        while not queue.empty():
+            stranded.append(queue.get_nowait())
+        error = None if task.cancelled() else task.exception()
+        if error is not None:
+            logger.error("Analysis coalescer stopped: %s", error)
+        _fail_pending(stranded, error or RuntimeError("Analysis coalescer stopped"))
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await queue.get()]
+            try:
+                deadline = loop.time() + ANALYSIS_COALESCE_WINDOW_SECONDS
+                while (remaining := deadline - loop.time()) > 0:
+                    try:
+                        pending.append(await asyncio.wait_for(queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                groups: Dict[Tuple[int, str], list[list]] = {}
+                for item in pending:
+                    client, session_system_prompt, conversation_log, _ = item
+                    batches = groups.setdefault((id(client), session_system_prompt), [[]])
+                    current = batches[-1]
+                    tokens = sum(_estimate_tokens(entry[2]) for entry in current)
+                    if current and (
+                        len(current) >= settings.analysis_coalesce_max_batch
+                        or tokens + _estimate_tokens(conversation_log) > ANALYSIS_COALESCE_MAX_TOKENS
+                    ):
+                        current = []
+                        batches.append(current)
+                    current.append(item)
+            except BaseException as exc:
+                _fail_pending(pending, RuntimeError(f"Analysis coalescer stopped: {exc!r}"))
+                raise
+
+            for batches in groups.values():
+                for batch in batches:
+                    task = loop.create_task(self._dispatch(batch))
+                    self._dispatches.add(task)
+                    task.add_done_callback(self._dispatch_done)
+
+    def _dispatch_done(self, task: asyncio.Task) -> None:
+        self._dispatches.discard(task)
+
+    @staticmethod
+    async def _dispatch(batch: list) -> None:
+        client, session_system_prompt = batch[0][0], batch[0][1]
+        try:
+            if len(batch) == 1:
+                results = [await _request_analysis(client, session_system_prompt, batch[0][2])]
+            else:
+                results = await _request_analyses(
+                    client, session_system_prompt, [entry[2] for entry in batch]
+                )
+        except asyncio.CancelledError:
+            _fail_pending(batch, RuntimeError("Analysis request was cancelled"))
+            raise
+        except Exception as exc:
+            _fail_pending(batch, exc)
+            return
+        for (*_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _fail_pending(items: Iterable[tuple], exc: BaseException) -> None:
+    for *_, future in items:
+        if not future.done():
+            future.set_exception(exc)
+
+
+_analysis_coalescer = _AnalysisCoalescer()
+
+
+async def analyse_conversation(
     *,
-    client: OpenAI,
+    client: AsyncOpenAI,
     conversation_log: str,
     session_system_prompt: str,
+    use_cache: bool = True,
 ) -> Tuple[ConversationAnalysis, str]:
-    logger = logging.getLogger("moonai.analysis")
-    
-    messages = _build_analysis_prompt(
-        system_prompt=session_system_prompt, conversation_log=conversation_log
-    )
+    # use_cache=False skips the lookup but still overwrites the cache entry, so
+    # a forced re-analysis refreshes what later requests are served.
+    cache_key = _analysis_cache_key(session_system_prompt, conversation_log)
+    if use_cache:
+        cached = await _cached_analysis(cache_key)
+        if cached is not None:
+            return cached
 
     try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=messages,
-            temperature=0.2,
-            response_format={"type": "json_object"},
-        )
+        if settings.analysis_coalesce_max_batch > 1:
+            analysis, content = await _analysis_coalescer.submit(
+                client, session_system_prompt, conversation_log
+            )
+        else:
+            analysis, content = await _request_analysis(
+                client, session_system_prompt, conversation_log
+            )
+        await _cache_analysis(cache_key, content)
+        return analysis, content
+    except Exception as exc:
+        logger.error("OpenAI API call failed: %s", exc)
+        raise
+
+
+class _FieldBoundaryScanner:
+    """Finds the commas that separate top-level fields of a streamed JSON object."""
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, buffer: bytearray, start: int) -> int | None:
+        """Scan ``buffer[start:]`` and return the offset of its last top-level comma."""
+        boundary = None
+        for offset in range(start, len(buffer)):
+            byte = buffer[offset]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif byte == 0x5C:  # backslash
+                    self._escaped = True
+                elif byte == 0x22:  # quote
+                    self._in_string = False
+            elif byte == 0x22:
+                self._in_string = True
+            elif byte in b"{[":
+                self._depth += 1
+            elif byte in b"}]":
+                self._depth -= 1
+            elif byte == 0x2C and self._depth == 1:  # comma
+                boundary = offset
+        return boundary
+
+
+async def analyse_conversation_stream(
+    *,
+    client: AsyncOpenAI,
+    conversation_log: str,
+    session_system_prompt: str,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream the analysis and yield ``(field_name, value)`` as soon as each top-level field is complete.
 
-        content = response.choices[0].message.content or "{}"
-        logger.debug("OpenAI response content length: %d", len(content))
-        
+    The last item is ``("analysis", (ConversationAnalysis, raw_content))`` with the
+    validated result, so callers can persist it exactly like `analyse_conversation`.
+    """
+
+    cache_key = _analysis_cache_key(session_system_prompt, conversation_log)
+    cached = await _cached_analysis(cache_key)
+    if cached is not None:
+        for field, value in cached[0].model_dump().items():
+            yield field, value
+        yield "analysis", cached
+        return
+
+    buffer = bytearray()
+    scanner = _FieldBoundaryScanner()
+    emitted: set[str] = set()
+    try:
+        stream = await client.chat.completions.create(
+            **_completion_params(session_system_prompt, conversation_log),
+            stream=True,
+        )
+        # Closed however the consumer stops, so an abandoned completion does not
+        # keep its pooled HTTP/2 stream open (or keep generating).
         try:
-            data = ConversationAnalysis.model_validate_json(content)
-            return data, content
-        except Exception as validation_error:
-            logger.error(
-                "Failed to validate OpenAI response: %s. Content: %s",
-                validation_error,
-                content[:500]
-            )
-            raise ValueError(f"Invalid analysis response format: {validation_error}") from validation_error
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                start = len(buffer)
+                buffer += delta.encode("utf-8")
+
+                # Parse only when a top-level field has just ended: everything before
+                # that comma is final, and the handful of fields keeps parsing linear
+                # instead of re-reading the whole buffer on every token.
+                boundary = scanner.feed(buffer, start)
+                if boundary is None:
+                    continue
+                partial = from_json(bytes(buffer[:boundary]), allow_partial=True)
+                if not isinstance(partial, dict):
+                    continue
+                for field, value in partial.items():
+                    if field not in emitted:
+                        emitted.add(field)
+                        yield field, value
+        finally:
+            await stream.close()
     except Exception as exc:
         logger.error("OpenAI API call failed: %s", exc)
         raise
 
+    content = buffer.decode("utf-8") or "{}"
+    logger.debug("OpenAI response content length: %d", len(content))
+    analysis = _parse_analysis(content)
+    await _cache_analysis(cache_key, content)
+    for field, value in analysis.model_dump().items():
+        if field not in emitted:
+            yield field, value
+    yield "analysis", (analysis, content)
+
+
+class AnalysisBatchError(RuntimeError):
+    """Raised when an OpenAI analysis batch ends without usable output."""
+
+
+async def submit_analysis_batch(
+    *,
+    client: AsyncOpenAI,
+    entries: Iterable[Tuple[str, str, str]],
+) -> str:
+    """
+    Submit analyses as one OpenAI Batch API job and return the batch id.
+
+    Each entry is ``(custom_id, session_system_prompt, conversation_log)``.
+    Batch jobs are billed at half the synchronous price and finish within 24h.
+    """
+
+    lines = [
+        orjson.dumps(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": _completion_params(session_system_prompt, conversation_log),
+            }
+        )
+        for custom_id, session_system_prompt, conversation_log in entries
+    ]
+    if not lines:
+        raise ValueError("Cannot submit an empty analysis batch")
+
+    batch_file = await client.files.create(
+        file=("analysis_batch.jsonl", b"\n".join(lines)),
+        purpose="batch",
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logger.info("Submitted analysis batch %s with %d conversations", batch.id, len(lines))
+    return batch.id
+
+
+async def fetch_analysis_batch(
+    *,
+    client: AsyncOpenAI,
+    batch_id: str,
+) -> Dict[str, Tuple[ConversationAnalysis, str] | Exception] | None:
+    """
+    Return per-``custom_id`` results of a finished batch, or None while it is still running.
+
+    A failed entry maps to the exception describing why it could not be parsed.
+    """
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status in ("failed", "expired", "cancelled"):
+        raise AnalysisBatchError(f"Analysis batch {batch_id} ended with status {batch.status}")
+    if batch.status != "completed":
+        return None
+
+    results: Dict[str, Tuple[ConversationAnalysis, str] | Exception] = {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            custom_id = record["custom_id"]
+            try:
+                if record.get("error"):
+                    raise AnalysisBatchError(str(record["error"]))
+                body = record["response"]["body"]
+                content = body["choices"][0]["message"]["content"] or "{}"
+                results[custom_id] = (_parse_analysis(content), content)
+            except Exception as exc:
+                results[custom_id] = exc
+    return results
+
+
+# Attempts after the first one. The SDK retries connection errors, timeouts,
+# 408/409/429 and 5xx with exponential backoff and jitter, honouring Retry-After.
+OPENAI_MAX_RETRIES = 4
+_openai_client: AsyncOpenAI | None = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    global _openai_client
+    if _openai_client is None:
+        # Imported here: the SDK is heavy and only needed once an analysis runs.
+        from openai import AsyncOpenAI
+
+        # A shared async client lets concurrent analyses overlap on the event
+        # loop instead of each holding a worker thread for the whole call.
+        _openai_client = AsyncOpenAI(
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        )
+    return _openai_client
 
-def get_openai_client() -> OpenAI:
-    return OpenAI()
 
+async def close_openai_client() -> None:
+    """Close the shared OpenAI connection pool; the next call reopens it."""
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
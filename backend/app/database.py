@@ -1,33 +1,76 @@
 from __future__ import annotations
 
 import os
+from typing import AsyncIterator
 
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
-load_dotenv()
-
+from .settings import settings
 
 # Use data directory for database file
-DB_DIR = os.getenv("DB_DIR", "/app/data")
+DB_DIR = settings.db_dir
 try:
     os.makedirs(DB_DIR, exist_ok=True)
 except OSError:
     pass  # Directory might already exist or be created by volume mount
-DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_DIR}/sales_training.db")
+DATABASE_URL = settings.database_url
+
+# Async drivers for the URLs this app is deployed with; any other URL must
+# already name an async driver.
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _async_url(url: str) -> URL:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    return parsed.set(drivername=driver) if driver else parsed
+
+
+if DATABASE_URL.startswith("sqlite"):
+    # Keep a fixed pool of open connections instead of SQLite's default
+    # one-connection-per-thread pool, which reopens the file under FastAPI's threadpool.
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+
+    async_engine = create_async_engine(
+        _async_url(DATABASE_URL),
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,
+        connect_args={"timeout": 30},
+    )
+
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+else:
+    engine = create_engine(DATABASE_URL)
+    async_engine = create_async_engine(_async_url(DATABASE_URL), pool_size=20, max_overflow=40)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
+# Sync sessions serve startup DDL, the batch worker and the analysis cache; the
+# API routes use AsyncSession so waiting on the database never holds a thread.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
-import os
+import asyncio
 import logging
-from typing import Any, Dict, Tuple
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Final, Tuple
+from urllib.parse import parse_qs, urlsplit
 
-from dotenv import load_dotenv
-from elevenlabs import ElevenLabs
+import httpx
 
-load_dotenv()
+from .settings import settings
 
+if TYPE_CHECKING:
+    from elevenlabs import AsyncElevenLabs, ElevenLabs
 
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-ELEVENLABS_AGENT_ID = os.getenv("ELEVENLABS_AGENT_ID")
-ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
+# ElevenLabs signed URLs are valid for 15 minutes; hand them out well before that.
+SIGNED_URL_TTL_SECONDS = 600.0
 
 
 logger = logging.getLogger("moonai.elevenlabs")
@@ -22,70 +27,225 @@ class ElevenLabsError(RuntimeError):
     """Raised when ElevenLabs API requests fail."""
 
 
+# Both SDK clients share these pool settings so TLS connections to
+# api.elevenlabs.io stay alive between session creations.
+_HTTPX_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+_HTTPX_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+
+# Retries on two layers: the transport re-dials connections that failed to
+# establish (nothing was sent, so any request is safe to repeat), and the SDK
+# retries 408/409/429/5xx with exponential backoff, jitter and Retry-After.
+# Other 4xx responses are never retried.
+_HTTPX_CONNECT_RETRIES = 3
+_REQUEST_OPTIONS: Final[Dict[str, Any]] = {"max_retries": 4}
+
 _elevenlabs_client: ElevenLabs | None = None
+_async_elevenlabs_client: AsyncElevenLabs | None = None
+# The pooled transports behind the SDK clients, kept so shutdown can close them.
+_httpx_client: httpx.Client | None = None
+_async_httpx_client: httpx.AsyncClient | None = None
 
 
-def _get_elevenlabs_client() -> ElevenLabs:
-    global _elevenlabs_client
+def get_elevenlabs_client() -> ElevenLabs:
+    global _elevenlabs_client, _httpx_client
     if _elevenlabs_client is None:
-        if not ELEVENLABS_API_KEY:
+        if not settings.elevenlabs_api_key:
             raise ElevenLabsError("ELEVENLABS_API_KEY is not configured")
-        _elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+        from elevenlabs import ElevenLabs
+
+        _httpx_client = httpx.Client(
+            timeout=_HTTPX_TIMEOUT,
+            transport=httpx.HTTPTransport(
+                http2=True, limits=_HTTPX_LIMITS, retries=_HTTPX_CONNECT_RETRIES
+            ),
+        )
+        _elevenlabs_client = ElevenLabs(
+            api_key=settings.elevenlabs_api_key,
+            timeout=_HTTPX_TIMEOUT.read,
+            httpx_client=_httpx_client,
+        )
     return _elevenlabs_client
 
 
-def validate_agent(agent_id: str) -> None:
+def get_async_elevenlabs_client() -> AsyncElevenLabs:
+    global _async_elevenlabs_client, _async_httpx_client
+    if _async_elevenlabs_client is None:
+        if not settings.elevenlabs_api_key:
+            raise ElevenLabsError("ELEVENLABS_API_KEY is not configured")
+        from elevenlabs import AsyncElevenLabs
+
+        _async_httpx_client = httpx.AsyncClient(
+            timeout=_HTTPX_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True, limits=_HTTPX_LIMITS, retries=_HTTPX_CONNECT_RETRIES
+            ),
+        )
+        _async_elevenlabs_client = AsyncElevenLabs(
+            api_key=settings.elevenlabs_api_key,
+            timeout=_HTTPX_TIMEOUT.read,
+            httpx_client=_async_httpx_client,
+        )
+    return _async_elevenlabs_client
+
+
+async def close_elevenlabs_clients() -> None:
+    """Close the pooled ElevenLabs connections; the next call reopens them."""
+    global _elevenlabs_client, _async_elevenlabs_client, _httpx_client, _async_httpx_client
+    # Stop refills before their client goes away, and drop URLs issued for it.
+    refills = list(_signed_url_refills.values())
+    for task in refills:
+        task.cancel()
+    await asyncio.gather(*refills, return_exceptions=True)
+    _signed_url_refills.clear()
+    _signed_url_pool.clear()
+    if _httpx_client is not None:
+        _httpx_client.close()
+    if _async_httpx_client is not None:
+        await _async_httpx_client.aclose()
+    _elevenlabs_client = _async_elevenlabs_client = None
+    _httpx_client = _async_httpx_client = None
+
+
+# agent_id -> monotonic deadline until which a successful validation is reused.
+_validated_agents: Dict[str, float] = {}
+_validated_agents_lock = threading.Lock()
+AGENT_VALIDATION_TTL_SECONDS = 600.0
+
+
+def _agent_validation_cached(agent_id: str) -> bool:
+    with _validated_agents_lock:
+        return time.monotonic() < _validated_agents.get(agent_id, 0.0)
+
+
+def _remember_agent_validation(agent_id: str, valid: bool) -> None:
+    with _validated_agents_lock:
+        if valid:
+            _validated_agents[agent_id] = time.monotonic() + AGENT_VALIDATION_TTL_SECONDS
+        else:
+            _validated_agents.pop(agent_id, None)
+
+
+async def validate_agent_async(agent_id: str) -> None:
     """Validate that the agent exists and is accessible."""
+    if _agent_validation_cached(agent_id):
+        return
+
     try:
-        client = _get_elevenlabs_client()
-        agent = client.conversational_ai.agents.get(agent_id=agent_id)
+        client = get_async_elevenlabs_client()
+        agent = await client.conversational_ai.agents.get(
+            agent_id=agent_id, request_options=_REQUEST_OPTIONS
+        )
         logger.info(
             "Agent validation successful: agent_id=%s, name=%s",
             agent_id,
             getattr(agent, "name", "unknown")
         )
     except Exception as exc:
+        _remember_agent_validation(agent_id, False)
         logger.error("Agent validation failed for agent_id=%s: %s", agent_id, exc)
         raise ElevenLabsError(f"Agent validation failed: {exc}") from exc
 
+    _remember_agent_validation(agent_id, True)
+
+
+def _conversation_from_signed_url(agent_id: str, signed_url: str | None) -> Tuple[str | None, str]:
+    if not signed_url:
+        raise ElevenLabsError("Empty signed URL received from ElevenLabs")
 
-def request_signed_ws_url(*, agent_id: str) -> Tuple[str | None, str]:
-    client = _get_elevenlabs_client()
+    conversation_id = parse_qs(urlsplit(signed_url).query).get("conversation_id", [None])[0]
+    if not conversation_id:
+        raise ElevenLabsError("Conversation ID not found in signed URL")
+
+    logger.info(
+        "Successfully obtained signed URL: agent_id=%s, conversation_id=%s, url_length=%d",
+        agent_id,
+        conversation_id,
+        len(signed_url)
+    )
+
+    return conversation_id, signed_url
+
+
+async def request_signed_ws_url_async(*, agent_id: str) -> Tuple[str | None, str]:
+    client = get_async_elevenlabs_client()
     try:
-        response = client.conversational_ai.conversations.get_signed_url(
+        response = await client.conversational_ai.conversations.get_signed_url(
             agent_id=agent_id,
             include_conversation_id=True,
+            request_options=_REQUEST_OPTIONS,
         )
-
-        signed_url = response.signed_url
-        if not signed_url:
-            raise ElevenLabsError("Empty signed URL received from ElevenLabs")
-        
-        conversation_id = signed_url[signed_url.find("conversation_id=")+len("conversation_id="):]
-        if not conversation_id:
-            raise ElevenLabsError("Conversation ID not found in signed URL")
-
-        logger.info(
-            "Successfully obtained signed URL: agent_id=%s, conversation_id=%s, url_length=%d",
-            agent_id,
-            conversation_id,
-            len(signed_url)
-        )
-        
-        return conversation_id, signed_url
+        return _conversation_from_signed_url(agent_id, response.signed_url)
     except Exception as exc:
         logger.exception("Failed to request signed WebSocket URL for agent_id=%s", agent_id)
         raise ElevenLabsError(f"Failed to get signed WebSocket URL: {exc}") from exc
 
-def get_client_behavior_description(client_type: str | None) -> str | None:
-    """
-    Возвращает детальное описание поведения клиента на основе client_type.
-    Описание на русском языке в стиле системного промпта.
-    """
-    if not client_type:
-        return None
-    
-    behavior_descriptions: Dict[str, str] = {
+# Pre-issued (conversation_id, signed_url, expires_at) entries per agent, so
+# starting a call does not wait for an ElevenLabs round-trip.
+_signed_url_pool: Dict[str, Deque[Tuple[str | None, str, float]]] = {}
+_signed_url_pool_lock = asyncio.Lock()
+_signed_url_refills: Dict[str, asyncio.Task] = {}
+
+
+def _signed_url_expiry(signed_url: str) -> float:
+    """Monotonic deadline for handing out a signed URL, honouring an explicit expiry param."""
+    expires_at = time.monotonic() + SIGNED_URL_TTL_SECONDS
+    query = parse_qs(urlsplit(signed_url).query)
+    for key in ("expires", "exp"):
+        try:
+            remaining = float(query[key][0]) - time.time()
+        except (KeyError, ValueError):
+            continue
+        expires_at = min(expires_at, time.monotonic() + remaining)
+    return expires_at
+
+
+async def _refill_signed_url_pool(agent_id: str) -> None:
+    try:
+        while True:
+            async with _signed_url_pool_lock:
+                if len(_signed_url_pool.setdefault(agent_id, deque())) >= settings.elevenlabs_signed_url_pool_size:
+                    return
+            conversation_id, signed_url = await request_signed_ws_url_async(agent_id=agent_id)
+            async with _signed_url_pool_lock:
+                _signed_url_pool[agent_id].append(
+                    (conversation_id, signed_url, _signed_url_expiry(signed_url))
+                )
+    except ElevenLabsError:
+        async with _signed_url_pool_lock:
+            _signed_url_pool.pop(agent_id, None)
+    finally:
+        _signed_url_refills.pop(agent_id, None)
+
+
+def _schedule_signed_url_refill(agent_id: str) -> None:
+    if settings.elevenlabs_signed_url_pool_size <= 0 or agent_id in _signed_url_refills:
+        return
+    _signed_url_refills[agent_id] = asyncio.create_task(_refill_signed_url_pool(agent_id))
+
+
+async def acquire_signed_ws_url(*, agent_id: str) -> Tuple[str | None, str]:
+    """Return a pre-issued signed URL for the agent, or request one if none is ready."""
+    entry = None
+    async with _signed_url_pool_lock:
+        pool = _signed_url_pool.get(agent_id)
+        now = time.monotonic()
+        while pool:
+            conversation_id, signed_url, expires_at = pool.popleft()
+            if expires_at > now:
+                entry = conversation_id, signed_url
+                break
+
+    _schedule_signed_url_refill(agent_id)
+    if entry is not None:
+        logger.info("Using pre-issued signed URL: agent_id=%s, conversation_id=%s", agent_id, entry[0])
+        return entry
+    return await request_signed_ws_url_async(agent_id=agent_id)
+
+
+# Описания поведения клиента по client_type; строятся один раз при импорте.
+_BEHAVIOR_DESCRIPTIONS: Final[Dict[str, str]] = {
+    sys.intern(client_type): description
+    for client_type, description in {
         "Дружелюбный": (
             "Ты дружелюбный директор: теплый, открытый к общению, но всё же осторожный. "
             "Отвечаешь вежливо, можешь поддержать разговор, но не забываешь о своих интересах. "
@@ -143,9 +303,30 @@ def get_client_behavior_description(client_type: str | None) -> str | None:
             "Можешь быть холодным, отстраненным, формальным, но с язвинкой. "
             "Не помогаешь менеджеру, но и не отказываешь сразу — создаешь дискомфорт."
         ),
-    }
-    
-    return behavior_descriptions.get(client_type.strip())
+    }.items()
+}
+
+# Нейтральное описание поведения, если client_type не указан или неизвестен.
+_DEFAULT_BEHAVIOR: Final[str] = (
+    "Ты руководитель бизнеса: вежливый, но осторожный. "
+    "Отвечаешь по делу, задаешь вопросы, проверяешь детали предложения. "
+    "Не проявляешь излишнего энтузиазма, но и не отказываешь сразу. "
+    "Требуешь конкретики, цифр, сроков, условий."
+)
+
+
+def get_client_behavior_description(client_type: str | None) -> str | None:
+    """
+    Возвращает детальное описание поведения клиента на основе client_type.
+    Описание на русском языке в стиле системного промпта.
+    """
+    return _BEHAVIOR_DESCRIPTIONS.get(client_type.strip()) if client_type else None
+
+
+def _normalize(value: str | None) -> str | None:
+    if not value:
+        return None
+    return value.strip() or None
 
 
 def build_dynamic_variables(
@@ -153,31 +334,41 @@ def build_dynamic_variables(
     difficulty_level: str | None,
     client_type: str | None,
 ) -> Dict[str, Any]:
+    """
+    Собирает dynamic_variables для агента.
+    Ожидает уже нормализованные значения (см. `_normalize`).
+    """
     variables: Dict[str, Any] = {}
     if client_description:
-        variables["client_description"] = client_description.strip()
+        variables["client_description"] = client_description
     if difficulty_level:
-        variables["difficulty_level"] = difficulty_level.strip()
+        variables["difficulty_level"] = difficulty_level
     if client_type:
-        variables["client_type"] = client_type.strip()
-        # Добавляем описание поведения на основе типа клиента
-        behavior_desc = get_client_behavior_description(client_type)
-        if behavior_desc:
-            variables["client_behavior_description"] = behavior_desc
-    
-    # Если client_type не указан, используем нейтральное описание поведения
-    if "client_behavior_description" not in variables:
-        variables["client_behavior_description"] = (
-            "Ты руководитель бизнеса: вежливый, но осторожный. "
-            "Отвечаешь по делу, задаешь вопросы, проверяешь детали предложения. "
-            "Не проявляешь излишнего энтузиазма, но и не отказываешь сразу. "
-            "Требуешь конкретики, цифр, сроков, условий."
-        )
-    
+        variables["client_type"] = client_type
+    # Описание поведения по типу клиента; если тип не указан — нейтральное
+    variables["client_behavior_description"] = _BEHAVIOR_DESCRIPTIONS.get(
+        client_type, _DEFAULT_BEHAVIOR
+    )
+
     return variables
 
 
-def create_conversation_session(
+def build_conversation_override(
+    system_prompt: str,
+    first_message: str | None,
+) -> Dict[str, Any]:
+    agent: Dict[str, Any] = {"prompt": {"prompt": system_prompt}}
+    # Add first_message if provided
+    if first_message:
+        agent["first_message"] = first_message
+
+    # Add voice_id from environment if available
+    if settings.elevenlabs_voice_id:
+        return {"agent": agent, "tts": {"voice_id": settings.elevenlabs_voice_id}}
+    return {"agent": agent}
+
+
+async def create_conversation_session(
     *,
     client_description: str | None,
     difficulty_level: str | None,
@@ -185,61 +376,57 @@ def create_conversation_session(
     system_prompt: str,
     first_message: str | None = None,
 ) -> Tuple[str, str | None, str, Dict[str, Any], Dict[str, Any]]:
-    agent_id = ELEVENLABS_AGENT_ID
-    overrides: Dict[str, Any] = {
-        "agent": {
-            "prompt": {
-                "prompt": system_prompt,
-            }
-        }
-    }
-    
-    # Add first_message if provided
-    if first_message:
-        overrides["agent"]["first_message"] = first_message
-    
-    # Add voice_id from environment if available
-    if ELEVENLABS_VOICE_ID:
-        overrides["tts"] = {
-            "voice_id": ELEVENLABS_VOICE_ID
-        }
-    
+    agent_id = settings.elevenlabs_agent_id
+    # Normalize once so the agent receives byte-identical values everywhere
+    client_description = _normalize(client_description)
+    difficulty_level = _normalize(difficulty_level)
+    client_type = _normalize(client_type)
+
+    overrides = build_conversation_override(
+        system_prompt=system_prompt,
+        first_message=first_message,
+    )
     dynamic_variables = build_dynamic_variables(
         client_description=client_description,
         difficulty_level=difficulty_level,
         client_type=client_type,
     )
 
-    if not agent_id or not ELEVENLABS_API_KEY:
+    if not agent_id or not settings.elevenlabs_api_key:
         logger.error("ElevenLabs credentials missing; cannot create conversation session")
         raise ElevenLabsError("Missing ELEVENLABS_AGENT_ID or ELEVENLABS_API_KEY")
 
-    # Validate agent before creating session
-    try:
-        validate_agent(agent_id)
-    except ElevenLabsError:
+    # Validate the agent and obtain the signed URL concurrently
+    validation, signed = await asyncio.gather(
+        validate_agent_async(agent_id),
+        acquire_signed_ws_url(agent_id=agent_id),
+        return_exceptions=True,
+    )
+    if isinstance(validation, ElevenLabsError):
         # Re-raise validation errors
-        raise
-    except Exception as exc:
-        logger.warning("Agent validation skipped due to error (may not be critical): %s", exc)
+        raise validation
+    if isinstance(validation, Exception):
+        logger.warning("Agent validation skipped due to error (may not be critical): %s", validation)
+    if isinstance(signed, BaseException):
+        raise signed
+    conversation_id, signed_url = signed
 
     # Log the overrides structure for debugging
     logger.info(
         "Creating conversation session: agent_id=%s, overrides_keys=%s, dynamic_vars=%s",
         agent_id,
-        list(overrides.keys()),
-        list(dynamic_variables.keys()) if dynamic_variables else []
+        overrides.keys(),
+        dynamic_variables.keys(),
     )
-    logger.debug(
-        "Conversation config override structure: %s",
-        overrides
-    )
-    logger.debug(
-        "Dynamic variables: %s",
-        dynamic_variables
-    )
-
-    conversation_id, signed_url = request_signed_ws_url(agent_id=agent_id)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Conversation config override structure: %s",
+            overrides
+        )
+        logger.debug(
+            "Dynamic variables: %s",
+            dynamic_variables
+        )
 
     return agent_id, conversation_id, signed_url, overrides, dynamic_variables
 
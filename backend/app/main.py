@@ -1,12 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-import os
+import queue
+from contextlib import asynccontextmanager, suppress
+from logging.handlers import QueueHandler, QueueListener
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from .analysis_batch import run_analysis_batch_worker
+from .analysis_service import close_openai_client
+from .database import engine
+from .elevenlabs_service import close_elevenlabs_clients
+from .models import create_tables
+from .prompts import get_system_prompt
 from .routes import sessions, prompts, auth
+from .settings import settings
 
 
 logging.basicConfig(
@@ -16,26 +27,70 @@ logging.basicConfig(
 logger = logging.getLogger("moonai")
 
 
-def create_app() -> FastAPI:
-    app = FastAPI(title="MoonAI Sales Trainer", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # While the app runs, request handlers only enqueue log records; the listener
+    # thread writes them through the regular handlers, so a slow stderr never
+    # blocks the event loop. Outside the lifespan logging stays synchronous.
+    root_logger = logging.getLogger()
+    direct_handlers = root_logger.handlers[:]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, *direct_handlers, respect_handler_level=True)
+    log_listener.start()
+    root_logger.handlers = [QueueHandler(log_queue)]
+    # Once per process at startup rather than on every router import.
+    if settings.auto_create_tables:
+        create_tables(engine)
+    # Load the system prompt before the first session is created, not during it.
+    try:
+        get_system_prompt()
+    except OSError as exc:
+        logger.warning("System prompt not loaded at startup: %s", exc)
+
+    batch_worker = None
+    if settings.analysis_batch_enabled:
+        batch_worker = asyncio.create_task(run_analysis_batch_worker())
+    try:
+        yield
+    finally:
+        if batch_worker is not None:
+            batch_worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await batch_worker
+        await close_elevenlabs_clients()
+        await close_openai_client()
+        root_logger.handlers = direct_handlers
+        log_listener.stop()
+
 
-    # Get CORS origins from environment variable or use defaults
-    cors_origins_str = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173")
-    cors_origins = [origin.strip() for origin in cors_origins_str.split(",") if origin.strip()]
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="MoonAI Sales Trainer",
+        version="0.1.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
 
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=cors_origins,
-        allow_origin_regex=r"https?://(localhost|127\.0\.0\.1)(:[0-9]+)?",
+        allow_origins=list(settings.cors_origins),
+        allow_origin_regex=settings.cors_origin_regex,
         allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-        expose_headers=["*"],
+        # Exactly what the API serves and the frontend sends; wildcards make every
+        # preflight response echo back the requested headers.
+        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_headers=["Authorization", "Content-Type"],
+        expose_headers=["X-Next-Cursor"],
+        # Chromium's upper bound; browsers repeat the preflight far less often.
+        max_age=7200,
     )
 
+    # Probed constantly by the load balancer: serve fixed bytes on the event loop.
+    health_body = b'{"status":"ok"}'
+
     @app.get("/health")
-    def healthcheck():
-        return {"status": "ok"}
+    async def healthcheck():
+        return Response(content=health_body, media_type="application/json")
 
     app.include_router(auth.router)
     app.include_router(sessions.router)
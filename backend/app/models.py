@@ -2,11 +2,21 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text, UniqueConstraint, ForeignKey
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text, UniqueConstraint, ForeignKey
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 Base = declarative_base()
 
+# Multi-KB text columns of TrainingSession. They are only read when a query asks
+# for them with undefer_group(CONTENT_GROUP), so lookups, updates and deletes
+# do not pull transcripts and prompts off disk.
+CONTENT_GROUP = "content"
+
+
+def _utcnow() -> datetime:
+    # Columns are naive DateTime holding UTC; asyncpg rejects aware values for them.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -15,27 +25,36 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, nullable=False, unique=True, index=True)
     hashed_password = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc), nullable=False)
+    created_at = Column(DateTime, default=_utcnow, nullable=False)
 
 
 class TrainingSession(Base):
     __tablename__ = "training_sessions"
+    # Every history query filters on user_id first; each index matches one filter
+    # and sort combination so a page is read presorted and stops at LIMIT.
+    __table_args__ = (
+        # Default page and its keyset cursor (newest first per user).
+        Index("ix_training_sessions_user_start", "user_id", "session_start", "id"),
+        Index("ix_training_sessions_user_manager_start", "user_id", "manager_name", "session_start", "id"),
+        Index("ix_training_sessions_user_status_start", "user_id", "status", "session_start", "id"),
+        Index("ix_training_sessions_user_score", "user_id", "score", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     manager_name = Column(String, index=True, nullable=False)
-    session_start = Column(DateTime, default=datetime.now(timezone.utc))
+    session_start = Column(DateTime, default=_utcnow)
     session_end = Column(DateTime, nullable=True)
-    conversation_log = Column(Text, nullable=True)
-    ai_analysis = Column(Text, nullable=True)
+    conversation_log = deferred(Column(Text, nullable=True), group=CONTENT_GROUP)
+    ai_analysis = deferred(Column(Text, nullable=True), group=CONTENT_GROUP)
     score = Column(Float, nullable=True)
     feedback = Column(Text, nullable=True)
-    status = Column(String, default="active")
+    status = Column(String, default="active", index=True)
     client_description = Column(Text, nullable=True)
     difficulty_level = Column(String, nullable=True)
     client_type = Column(String, nullable=True)
     first_message = Column(Text, nullable=True)
-    session_system_prompt = Column(Text, nullable=True)
+    session_system_prompt = deferred(Column(Text, nullable=True), group=CONTENT_GROUP)
     signed_ws_url = Column(Text, nullable=True)
     conversation_id = Column(String, nullable=True)
     
@@ -43,6 +62,20 @@ class TrainingSession(Base):
     user = relationship("User", backref="training_sessions")
 
 
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    key = Column(String(64), primary_key=True)
+    response_json = Column(Text, nullable=False)
+    # Unix timestamp, used for TTL checks; indexed for the expiry sweep on write.
+    created_at = Column(Float, nullable=False, index=True)
+
+
 def create_tables(engine) -> None:
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes declared later
+    # to existing databases as well.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
@@ -1,36 +1,61 @@
 from __future__ import annotations
 
-import os
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
 from textwrap import dedent
-from elevenlabs import ElevenLabs
-from dotenv import load_dotenv
 
+from .elevenlabs_service import get_elevenlabs_client
+from .settings import settings
 
-load_dotenv()
 
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-ELEVENLABS_AGENT_ID = os.getenv("ELEVENLABS_AGENT_ID")
 PROMPT_FILE = Path(__file__).parent.parent / "system_prompt.txt"
 
-client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+# Every session creation needs the prompt, which only changes through
+# /api/prompts/fetch. Keep it in memory; the TTL bounds how long other worker
+# processes keep serving the old prompt after one of them fetched a new one.
+PROMPT_CACHE_TTL_SECONDS = 300.0
+_prompt_cache: tuple[str, float] | None = None
+_prompt_cache_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _read_prompt_file(path: Path, mtime_ns: int) -> str:
+    return path.read_bytes().decode("utf-8").strip()
 
 
 def load_prompt_from_file() -> str:
-    return PROMPT_FILE.read_text(encoding="utf-8").strip()
+    # One stat() per call; the file is only re-read after it has been rewritten.
+    return _read_prompt_file(PROMPT_FILE, PROMPT_FILE.stat().st_mtime_ns)
 
 
 def save_prompt_to_file(prompt: str) -> None:
     PROMPT_FILE.parent.mkdir(parents=True, exist_ok=True)
     PROMPT_FILE.write_text(prompt, encoding="utf-8")
+    _read_prompt_file.cache_clear()
+    _remember_prompt(prompt.strip())
 
 
 def fetch_and_update_prompt() -> str:
-    agent = client.conversational_ai.agents.get(agent_id=ELEVENLABS_AGENT_ID)
+    client = get_elevenlabs_client()
+    agent = client.conversational_ai.agents.get(agent_id=settings.elevenlabs_agent_id)
     prompt = agent.conversation_config.agent.prompt.prompt
     save_prompt_to_file(prompt)
     return prompt
 
 
+def _remember_prompt(prompt: str) -> None:
+    global _prompt_cache
+    with _prompt_cache_lock:
+        _prompt_cache = (prompt, time.monotonic() + PROMPT_CACHE_TTL_SECONDS)
+
+
 def get_system_prompt() -> str:
-    return load_prompt_from_file()
\ No newline at end of file
+    with _prompt_cache_lock:
+        cached = _prompt_cache
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+
+    prompt = load_prompt_from_file()
+    _remember_prompt(prompt)
+    return prompt
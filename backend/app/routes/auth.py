@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-import os
+from collections import deque
 from datetime import datetime, timedelta, timezone
 import logging
+import threading
+import time
+from typing import Any, Deque, Dict, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from ..database import get_db, engine
-from ..models import User, create_tables
+from ..database import get_db
+from ..models import User
+from ..settings import settings
 from ..schemas import (
     LoginRequest,
     TokenResponse,
@@ -22,21 +28,113 @@ from ..schemas import (
 
 logger = logging.getLogger("moonai.api.auth")
 router = APIRouter(prefix="/api/auth", tags=["auth"])
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# OWASP's minimum Argon2id profile (19 MiB, 2 passes, 1 lane): ~20-40 ms per
+# verify instead of ~200 ms with the passlib defaults. Hashes made with other
+# parameters are upgraded on the next successful login.
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+)
 bearer_scheme = HTTPBearer(auto_error=False)
 
-SECRET_KEY = os.getenv("AUTH_SECRET_KEY", "secret")
+SECRET_KEY = settings.auth_secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Built once instead of on every authenticated request.
+_DECODE_KWARGS: Dict[str, Any] = {
+    "key": SECRET_KEY,
+    "algorithms": [ALGORITHM],
+    "options": {"require_exp": True, "require_sub": True},
+}
+
+# Failed logins per (client IP, username) allowed within the window before
+# further attempts are rejected without running the password hash.
+LOGIN_MAX_FAILURES = 5
+LOGIN_FAILURE_WINDOW_SECONDS = 300.0
+# Bound on tracked (IP, username) pairs, so stuffing with random usernames cannot
+# grow the table without limit.
+LOGIN_FAILURE_MAX_KEYS = 10_000
+_login_failures: Dict[Tuple[str, str], Deque[float]] = {}
+
+# Verified token -> (deadline, user id, username, created_at). Every request of a
+# logged-in user carries the same token, so the signature check and the user
+# lookup are done at most once per TTL.
+TOKEN_CACHE_TTL_SECONDS = 30.0
+TOKEN_CACHE_MAX_ENTRIES = 10_000
+_token_cache: Dict[str, Tuple[float, int, str, datetime]] = {}
+_token_cache_lock = threading.Lock()
+
+
+def _recent_login_failures(key: Tuple[str, str]) -> int:
+    failures = _login_failures.get(key)
+    if failures is None:
+        return 0
+    cutoff = time.monotonic() - LOGIN_FAILURE_WINDOW_SECONDS
+    while failures and failures[0] < cutoff:
+        failures.popleft()
+    if not failures:
+        del _login_failures[key]
+        return 0
+    return len(failures)
+
+
+def _record_login_failure(key: Tuple[str, str]) -> None:
+    now = time.monotonic()
+    if key not in _login_failures and len(_login_failures) >= LOGIN_FAILURE_MAX_KEYS:
+        cutoff = now - LOGIN_FAILURE_WINDOW_SECONDS
+        for stale in [k for k, failures in _login_failures.items() if failures[-1] < cutoff]:
+            del _login_failures[stale]
+        if len(_login_failures) >= LOGIN_FAILURE_MAX_KEYS:
+            # Still full of live entries: forget the oldest pair.
+            del _login_failures[next(iter(_login_failures))]
+    _login_failures.setdefault(key, deque()).append(now)
+
+
+def _cached_token_user(token: str) -> User | None:
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        if time.time() >= entry[0]:
+            del _token_cache[token]
+            return None
+    _, user_id, username, created_at = entry
+    # A detached copy: routes only read from the current user.
+    return User(id=user_id, username=username, created_at=created_at)
+
 
-create_tables(engine)
+def _remember_token_user(token: str, user: User, expires_at: float) -> None:
+    deadline = min(time.time() + TOKEN_CACHE_TTL_SECONDS, expires_at)
+    with _token_cache_lock:
+        if len(_token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+            del _token_cache[next(iter(_token_cache))]
+        _token_cache[token] = (deadline, user.id, user.username, user.created_at)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def _authenticate(db: AsyncSession, username: str, password: str) -> Any | None:
+    # Only the columns login needs, without building a User instance.
+    result = await db.execute(
+        select(User.id, User.username, User.hashed_password).where(User.username == username)
+    )
+    user = result.first()
+    if user is None:
+        return None
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        # The password hash is deliberately slow; keep it off the event loop.
+        valid, new_hash = await run_in_threadpool(
+            pwd_context.verify_and_update, password, user.hashed_password
+        )
     except Exception:
-        return False
+        return None
+    if not valid:
+        return None
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
+    return user
 
 
 def get_password_hash(password: str) -> str:
@@ -53,9 +151,9 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded_jwt
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,17 +165,22 @@ def get_current_user(
         raise credentials_exception
 
     token = credentials.credentials
+    cached_user = _cached_token_user(token)
+    if cached_user is not None:
+        return cached_user
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, **_DECODE_KWARGS)
         user_id: str | None = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    user = db.get(User, int(user_id))
+    user = await db.get(User, int(user_id))
     if user is None:
         raise credentials_exception
+    _remember_token_user(token, user, float(payload["exp"]))
     return user
 
 
@@ -87,14 +190,12 @@ def get_current_user(
     status_code=status.HTTP_201_CREATED,
     summary="Register a new user (Swagger only endpoint)",
 )
-def register_user(payload: UserCreate, db: Session = Depends(get_db)):
+async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a user account. Keep this endpoint accessible via Swagger UI only.
     """
-    existing_user = (
-        db.query(User).filter(User.username == payload.username.lower()).first()
-    )
-    if existing_user:
+    result = await db.execute(select(User.id).where(User.username == payload.username.lower()))
+    if result.scalar_one_or_none() is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Username already registered",
@@ -102,11 +203,12 @@ def register_user(payload: UserCreate, db: Session = Depends(get_db)):
 
     user = User(
         username=payload.username.lower(),
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=await run_in_threadpool(get_password_hash, payload.password),
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    # The id and created_at are set on `user` by the flush; no refresh needed.
+    # created_at is naive UTC, exactly what /me reads back, so both serialise alike.
+    await db.commit()
     logger.info("Created user %s", user.username)
     return user
 
@@ -116,13 +218,26 @@ def register_user(payload: UserCreate, db: Session = Depends(get_db)):
     response_model=TokenResponse,
     summary="Authenticate user and return access token",
 )
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == payload.username.lower()).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+async def login(payload: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    username = payload.username.lower()
+    # The real client address: uvicorn rewrites request.client from X-Forwarded-For
+    # sent by the proxies listed in FORWARDED_ALLOW_IPS (see the Dockerfile).
+    failure_key = (request.client.host if request.client else "", username)
+    if _recent_login_failures(failure_key) >= LOGIN_MAX_FAILURES:
+        logger.warning("Too many failed logins for %s from %s", username, failure_key[0])
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Please try again later.",
+        )
+
+    user = await _authenticate(db, username, payload.password)
+    if user is None:
+        _record_login_failure(failure_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    _login_failures.pop(failure_key, None)
 
     expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     token = create_access_token(
@@ -141,6 +256,6 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     response_model=UserResponse,
     summary="Get the currently authenticated user",
 )
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
@@ -1,22 +1,52 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
 from datetime import datetime, timezone
 import logging
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+import random
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer_group
+from sqlalchemy import (
+    Select,
+    and_,
+    asc,
+    bindparam,
+    delete,
+    desc,
+    func,
+    insert,
+    select,
+    tuple_,
+    update,
+)
 
-from ..analysis_service import analyse_conversation, get_openai_client
-from ..database import get_db, engine
-from ..models import TrainingSession, User, create_tables
+from ..analysis_batch import ANALYZING_STATUS
+from ..analysis_service import (
+    analyse_conversation,
+    analyse_conversation_stream,
+    get_openai_client,
+)
+from ..database import AsyncSessionLocal, get_db
+from ..models import CONTENT_GROUP, TrainingSession, User
 from ..prompts import get_system_prompt
+from ..session_counts import cached_count, forget_counts, remember_count
+from ..settings import settings
 from ..schemas import (
     CompleteSessionRequest,
+    ReanalyzeSessionsRequest,
     StartSessionResponse,
     TrainingSessionCreate,
     TrainingSessionResponse,
+    TrainingSessionSummary,
     TrainingSessionUpdate,
 )
 from .. import elevenlabs_service
@@ -29,16 +59,149 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 logger = logging.getLogger("moonai.api.sessions")
+_log_sampler = random.Random()
+
+
+def _log_sampled(msg: str, *args: Any) -> None:
+    # History is fetched on every page and filter change; log only a sample of it.
+    if _log_sampler.random() < settings.history_log_sample_rate:
+        logger.info(msg, *args)
+
+# Sessions whose analysis runs in this process: after /complete?background=true
+# answered 202, or while /complete/stream streams it. Kept apart from
+# ANALYZING_STATUS, which the batch worker collects.
+PROCESSING_STATUS = "processing"
+# Completions a dropped stream handed off; the loop only holds weak references.
+_detached_completions: set[asyncio.Task] = set()
+
+# OpenAI requests in flight at once for one /reanalyze call.
+REANALYZE_CONCURRENCY = 10
+
+# Endpoints that return full sessions load the deferred text columns up front
+# rather than lazily, one extra SELECT per row.
+_WITH_CONTENT = [undefer_group(CONTENT_GROUP)]
+# RETURNING these gives every field of TrainingSessionResponse.
+_SESSION_ROW = tuple(TrainingSession.__table__.c)
+# The history list leaves out the transcript, analysis, prompt and signed URL.
+_SUMMARY_ROW = tuple(
+    column for column in TrainingSession.__table__.c if column.key in TrainingSessionSummary.model_fields
+)
+# Built once; validates a page of rows and dumps it to JSON bytes directly.
+_SUMMARY_LIST = TypeAdapter(List[TrainingSessionSummary])
+
+def _encode_cursor(value: Any, session_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(orjson.dumps([value, session_id])).decode("ascii")
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> tuple[Any, int]:
+    try:
+        value, session_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if value is not None and sort_by in ("session_start", "session_end"):
+            value = datetime.fromisoformat(value)
+        return value, int(session_id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {exc}")
 
 
-create_tables(engine)
+def _after_cursor(sort_field: Any, descending: bool, cursor: str) -> Any:
+    """
+    Rows that follow (:cursor_value, :cursor_id) in `sort_field, id` order with NULLs last.
+
+    "value" covers only the non-NULL rows after a non-NULL cursor: a single row-value
+    comparison the index can range-scan. The NULL rows that follow them are read
+    separately with "null_tail" (all of them) or "null" (after a NULL cursor).
+    """
+    if cursor == "null_tail":
+        return sort_field.is_(None)
+    session_id = bindparam("cursor_id")
+    if cursor == "null":
+        after_id = TrainingSession.id < session_id if descending else TrainingSession.id > session_id
+        return and_(sort_field.is_(None), after_id)
+    key = tuple_(sort_field, TrainingSession.id)
+    position = tuple_(bindparam("cursor_value", type_=sort_field.type), session_id)
+    return key < position if descending else key > position
+
+
+# History sort options; anything else falls back to session_start.
+_SORT_FIELDS: Dict[str, Any] = {
+    "session_start": TrainingSession.session_start,
+    "score": TrainingSession.score,
+    "manager_name": TrainingSession.manager_name,
+    "session_end": TrainingSession.session_end,
+}
+_SORT_NULLABLE = {name: field.expression.nullable for name, field in _SORT_FIELDS.items()}
+
+
+@lru_cache(maxsize=None)
+def _history_statement(
+    by_manager: bool, by_status: bool, sort_by: str, descending: bool, cursor: str | None
+) -> Select:
+    """
+    The history query for one filter, sort and paging shape, built once.
+
+    `cursor` is None for offset paging, else the `_after_cursor` kind. Everything
+    else is a bound parameter, so each shape also compiles once.
+    """
+    sort_field = _SORT_FIELDS[sort_by]
+    query = select(*_SUMMARY_ROW).where(TrainingSession.user_id == bindparam("user_id"))
+    if by_manager:
+        query = query.where(TrainingSession.manager_name == bindparam("manager_name"))
+    if by_status:
+        query = query.where(TrainingSession.status == bindparam("status"))
+    direction = desc if descending else asc
+    # id breaks ties so every row has a unique position for the cursor
+    query = query.order_by(direction(sort_field).nulls_last(), direction(TrainingSession.id))
+    if cursor is None:
+        query = query.offset(bindparam("offset"))
+    else:
+        query = query.where(_after_cursor(sort_field, descending, cursor))
+    return query.limit(bindparam("limit"))
+
+
+def _json_response(model: BaseModel, status_code: int = status.HTTP_200_OK) -> Response:
+    # The model is already validated: dump it straight to JSON instead of letting
+    # FastAPI validate it against response_model and re-encode it.
+    return Response(content=model.model_dump_json(), status_code=status_code, media_type="application/json")
+
+
+async def _access_error(db: AsyncSession, session_id: int) -> HTTPException:
+    """404 or 403 for a statement filtered by id and owner that matched no row."""
+    owner_id = (
+        await db.execute(select(TrainingSession.user_id).where(TrainingSession.id == session_id))
+    ).scalar_one_or_none()
+    if owner_id is None:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this session")
+
+
+async def _store_completion(
+    db: AsyncSession, session_id: int, values: Dict[str, Any]
+) -> TrainingSessionResponse:
+    # A single UPDATE ... RETURNING in its own short transaction; the response is
+    # built from the returned row.
+    async with db.begin():
+        row = (
+            await db.execute(
+                update(TrainingSession)
+                .where(TrainingSession.id == session_id)
+                .values(**values)
+                .returning(*_SESSION_ROW)
+                .execution_options(synchronize_session=False)
+            )
+        ).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    forget_counts(row.user_id)
+    return TrainingSessionResponse.model_validate(row)
 
 
 @router.post("", response_model=StartSessionResponse)
-def create_session(
+async def create_session(
     payload: TrainingSessionCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
         logger.info(
@@ -47,6 +210,9 @@ def create_session(
             payload.difficulty_level or "auto",
         )
         session_prompt = get_system_prompt()
+        # get_current_user may have opened a transaction to load the user; return
+        # its connection to the pool before waiting on ElevenLabs.
+        await db.close()
 
         try:
             (
@@ -55,7 +221,7 @@ def create_session(
                 signed_ws_url,
                 overrides,
                 dynamic_variables,
-            ) = elevenlabs_service.create_conversation_session(
+            ) = await elevenlabs_service.create_conversation_session(
                 client_description=payload.client_description,
                 difficulty_level=payload.difficulty_level,
                 client_type=payload.client_type,
@@ -83,21 +249,27 @@ def create_session(
             signed_ws_url[:60] + "..." if signed_ws_url else "<none>",
         )
 
-        training_session = TrainingSession(
-            user_id=current_user.id,
-            manager_name=payload.manager_name,
-            client_description=payload.client_description,
-            difficulty_level=payload.difficulty_level,
-            client_type=payload.client_type,
-            first_message=payload.first_message,
-            session_system_prompt=session_prompt,
-            signed_ws_url=signed_ws_url,
-            conversation_id=conversation_id,
-        )
-
-        db.add(training_session)
-        db.commit()
-        db.refresh(training_session)
+        # The generated id and defaults come back from the INSERT itself rather
+        # than from a second SELECT.
+        async with db.begin():
+            training_session = (
+                await db.execute(
+                    insert(TrainingSession)
+                    .values(
+                        user_id=current_user.id,
+                        manager_name=payload.manager_name,
+                        client_description=payload.client_description,
+                        difficulty_level=payload.difficulty_level,
+                        client_type=payload.client_type,
+                        first_message=payload.first_message,
+                        session_system_prompt=session_prompt,
+                        signed_ws_url=signed_ws_url,
+                        conversation_id=conversation_id,
+                    )
+                    .returning(*_SESSION_ROW)
+                )
+            ).one()
+        forget_counts(current_user.id)
 
         response_payload = StartSessionResponse(
             session=TrainingSessionResponse.model_validate(training_session),
@@ -108,7 +280,7 @@ def create_session(
             dynamic_variables=dynamic_variables or None,
         )
 
-        return response_payload
+        return _json_response(response_payload)
     except HTTPException:
         raise
     except Exception as exc:
@@ -119,25 +291,34 @@ def create_session(
         )
 
 
-@router.get("", response_model=List[TrainingSessionResponse])
-def get_sessions_history(
+@router.get("", response_model=List[TrainingSessionSummary])
+async def get_sessions_history(
     manager_name: Optional[str] = Query(None, description="Filter by manager name"),
     status: Optional[str] = Query(None, description="Filter by status (active, completed)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of sessions to return"),
-    offset: int = Query(0, ge=0, description="Number of sessions to skip"),
+    offset: int = Query(0, ge=0, description="Number of sessions to skip (ignored with cursor)"),
+    cursor: Optional[str] = Query(
+        None, description="Continue after the page that returned this X-Next-Cursor header"
+    ),
     sort_by: str = Query("session_start", description="Sort by field (session_start, score, manager_name)"),
     sort_order: str = Query("desc", description="Sort order (asc, desc)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Get session history with all information:
-    - Session pre-requisites (settings): client_description, difficulty_level, client_type, first_message, session_system_prompt
-    - Conversation chat: conversation_log
-    - Analysis results: ai_analysis, score, feedback
+    Get session history summaries:
+    - Session pre-requisites (settings): client_description, difficulty_level, client_type, first_message
+    - Analysis results: score, feedback
+
+    The conversation log, AI analysis and system prompt of a session are returned by
+    `GET /api/sessions/{session_id}`.
+
+    Pages followed by more sessions carry an `X-Next-Cursor` header; pass it back as
+    `cursor` to fetch the next page with an index range scan instead of skipping
+    `offset` rows.
     """
     try:
-        logger.info(
+        _log_sampled(
             "Fetching sessions history for user %s (manager=%s, status=%s, limit=%d, offset=%d, sort_by=%s, sort_order=%s)",
             current_user.id,
             manager_name or "all",
@@ -148,31 +329,47 @@ def get_sessions_history(
             sort_order,
         )
         
-        query = db.query(TrainingSession).filter(TrainingSession.user_id == current_user.id)
-        
-        # Apply filters
-        if manager_name:
-            query = query.filter(TrainingSession.manager_name == manager_name)
-        if status:
-            query = query.filter(TrainingSession.status == status)
-        
         # Apply sorting - validate sort_by field exists
-        valid_sort_fields = ["session_start", "score", "manager_name", "session_end"]
-        if sort_by not in valid_sort_fields:
+        if sort_by not in _SORT_FIELDS:
             logger.warning("Invalid sort_by field '%s', using 'session_start'", sort_by)
             sort_by = "session_start"
         
-        sort_field = getattr(TrainingSession, sort_by, TrainingSession.session_start)
-        if sort_order.lower() == "asc":
-            query = query.order_by(asc(sort_field))
-        else:
-            query = query.order_by(desc(sort_field))
-        
+        descending = sort_order.lower() != "asc"
+        # One extra row tells whether another page exists without a COUNT query.
+        params: Dict[str, Any] = {
+            "user_id": current_user.id,
+            "manager_name": manager_name,
+            "status": status,
+            "limit": limit + 1,
+        }
         # Apply pagination
-        sessions = query.offset(offset).limit(limit).all()
+        if cursor:
+            params["cursor_value"], params["cursor_id"] = _decode_cursor(cursor, sort_by)
+            cursor_kind = "null" if params["cursor_value"] is None else "value"
+        else:
+            params["offset"] = offset
+            cursor_kind = None
+        query = _history_statement(bool(manager_name), bool(status), sort_by, descending, cursor_kind)
+        sessions = (await db.execute(query, params)).all()
+        if cursor_kind == "value" and len(sessions) <= limit and _SORT_NULLABLE[sort_by]:
+            # The non-NULL rows ran out within this page; continue with the NULL ones.
+            params["limit"] = limit + 1 - len(sessions)
+            query = _history_statement(bool(manager_name), bool(status), sort_by, descending, "null_tail")
+            sessions += (await db.execute(query, params)).all()
+        headers = {}
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            last = sessions[-1]
+            headers["X-Next-Cursor"] = _encode_cursor(getattr(last, sort_by), last.id)
         
-        logger.info("Found %d sessions", len(sessions))
-        return sessions
+        _log_sampled("Found %d sessions", len(sessions))
+        return Response(
+            content=_SUMMARY_LIST.dump_json(_SUMMARY_LIST.validate_python(sessions, from_attributes=True)),
+            media_type="application/json",
+            headers=headers,
+        )
+    except HTTPException:
+        raise
     except Exception as exc:
         logger.exception("Failed to fetch session history")
         raise HTTPException(
@@ -182,25 +379,34 @@ def get_sessions_history(
 
 
 @router.get("/count")
-def get_sessions_count(
+async def get_sessions_count(
     manager_name: Optional[str] = Query(None, description="Filter by manager name"),
     status: Optional[str] = Query(None, description="Filter by status (active, completed)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Get total count of sessions matching the filters.
     Useful for pagination on the frontend.
     """
+    key = (current_user.id, manager_name, status)
+    cached = cached_count(key)
+    if cached is not None:
+        return {"count": cached}
     try:
-        query = db.query(TrainingSession).filter(TrainingSession.user_id == current_user.id)
+        query = (
+            select(func.count())
+            .select_from(TrainingSession)
+            .where(TrainingSession.user_id == current_user.id)
+        )
         
         if manager_name:
-            query = query.filter(TrainingSession.manager_name == manager_name)
+            query = query.where(TrainingSession.manager_name == manager_name)
         if status:
-            query = query.filter(TrainingSession.status == status)
+            query = query.where(TrainingSession.status == status)
         
-        count = query.count()
+        count = (await db.execute(query)).scalar_one()
+        remember_count(key, count)
         return {"count": count}
     except Exception as exc:
         logger.exception("Failed to fetch session count")
@@ -211,17 +417,24 @@ def get_sessions_count(
 
 
 @router.delete("", response_model=dict)
-def delete_all_sessions(
+async def delete_all_sessions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Delete all training sessions for the current user.
     """
     try:
         logger.info("Deleting all training sessions for user %s", current_user.id)
-        deleted_count = db.query(TrainingSession).filter(TrainingSession.user_id == current_user.id).delete()
-        db.commit()
+        # A single DELETE statement: no rows are loaded to sync the identity map.
+        result = await db.execute(
+            delete(TrainingSession)
+            .where(TrainingSession.user_id == current_user.id)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        forget_counts(current_user.id)
+        deleted_count = result.rowcount
         
         logger.info("Successfully deleted %d training sessions", deleted_count)
         return {
@@ -230,7 +443,7 @@ def delete_all_sessions(
         }
     except Exception as exc:
         logger.exception("Failed to delete all training sessions")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete all sessions: {str(exc)}",
@@ -238,55 +451,57 @@ def delete_all_sessions(
 
 
 @router.get("/{session_id}", response_model=TrainingSessionResponse)
-def get_session(
+async def get_session(
     session_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    session = db.get(TrainingSession, session_id)
+    session = await db.get(TrainingSession, session_id, options=_WITH_CONTENT)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     if session.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this session")
-    return session
+    return _json_response(TrainingSessionResponse.model_validate(session))
 
 
 @router.put("/{session_id}", response_model=TrainingSessionResponse)
-def update_session(
+async def update_session(
     session_id: int,
     payload: TrainingSessionUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update a training session. All fields are optional and only provided fields will be updated.
     """
     try:
         logger.info("Updating training session %s", session_id)
-        session = db.get(TrainingSession, session_id)
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Session not found"
-            )
-        if session.user_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this session")
-
-        # Update only provided fields
+        owned = and_(TrainingSession.id == session_id, TrainingSession.user_id == current_user.id)
+        # Update only provided fields, reading the result back in the same statement
         update_data = payload.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(session, field, value)
-
-        db.add(session)
-        db.commit()
-        db.refresh(session)
+        if update_data:
+            stmt = (
+                update(TrainingSession)
+                .where(owned)
+                .values(**update_data)
+                .returning(*_SESSION_ROW)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            stmt = select(*_SESSION_ROW).where(owned)
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            raise await _access_error(db, session_id)
+        await db.commit()
+        forget_counts(current_user.id)
         
         logger.info("Successfully updated training session %s", session_id)
-        return session
+        return _json_response(TrainingSessionResponse.model_validate(row))
     except HTTPException:
         raise
     except Exception as exc:
         logger.exception("Failed to update training session %s", session_id)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update session: {str(exc)}",
@@ -294,26 +509,25 @@ def update_session(
 
 
 @router.delete("/{session_id}", response_model=dict)
-def delete_session(
+async def delete_session(
     session_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a single training session by ID.
     """
     try:
         logger.info("Deleting training session %s", session_id)
-        session = db.get(TrainingSession, session_id)
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Session not found"
-            )
-        if session.user_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this session")
-
-        db.delete(session)
-        db.commit()
+        result = await db.execute(
+            delete(TrainingSession)
+            .where(TrainingSession.id == session_id, TrainingSession.user_id == current_user.id)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            raise await _access_error(db, session_id)
+        await db.commit()
+        forget_counts(current_user.id)
         
         logger.info("Successfully deleted training session %s", session_id)
         return {"message": f"Session {session_id} deleted successfully", "deleted_id": session_id}
@@ -321,51 +535,300 @@ def delete_session(
         raise
     except Exception as exc:
         logger.exception("Failed to delete training session %s", session_id)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete session: {str(exc)}",
         )
 
 
+async def _analysis_values(
+    session_id: int, conversation_log: str, session_system_prompt: str
+) -> Dict[str, Any]:
+    try:
+        analysis, raw_payload = await analyse_conversation(
+            client=get_openai_client(),
+            conversation_log=conversation_log,
+            session_system_prompt=session_system_prompt,
+        )
+        return {
+            "ai_analysis": raw_payload,
+            "score": analysis.score,
+            "feedback": analysis.specific_feedback,
+        }
+    except Exception as exc:
+        logger.exception("Failed to analyze conversation for session %s", session_id)
+        # Store error in analysis field but don't fail the request
+        return {
+            "ai_analysis": f"Analysis failed: {str(exc)}",
+            "score": None,
+            "feedback": "Analysis service unavailable. Please try again later.",
+        }
+
+
+async def _analyse_in_background(
+    session_id: int, conversation_log: str, session_system_prompt: str
+) -> None:
+    values = await _analysis_values(session_id, conversation_log, session_system_prompt)
+    values["status"] = "completed"
+    try:
+        async with AsyncSessionLocal() as db:
+            await _store_completion(db, session_id, values)
+        logger.info("Stored background analysis for session %s", session_id)
+    except Exception:
+        logger.exception("Failed to store background analysis for session %s", session_id)
+
+
+async def _store_in_background(session_id: int, values: Dict[str, Any]) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await _store_completion(db, session_id, values)
+    except Exception:
+        logger.exception("Failed to store analysis for session %s", session_id)
+
+
+def _detach_completion(coro: Any) -> None:
+    task = asyncio.get_running_loop().create_task(coro)
+    _detached_completions.add(task)
+    task.add_done_callback(_detached_completions.discard)
+
+
 @router.post("/{session_id}/complete", response_model=TrainingSessionResponse)
-def complete_session(
+async def complete_session(
     session_id: int,
     payload: CompleteSessionRequest,
+    background_tasks: BackgroundTasks,
+    defer_analysis: bool = Query(
+        False,
+        description="Queue the analysis for the OpenAI Batch API instead of running it now",
+    ),
+    background: bool = Query(
+        False,
+        description="Answer 202 right away and run the analysis afterwards; poll GET /{session_id}",
+    ),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
+    """
+    Store the transcript and analyse the conversation.
+
+    With `defer_analysis=true` (and the batch worker enabled) the session is left in
+    the `analyzing` status and picked up by the next analysis batch.
+
+    With `background=true` the transcript is stored and the session returned with
+    202 in the `processing` status; it becomes `completed` once the analysis is
+    stored. A session left `processing` by a restart can be completed again.
+    """
     logger.info("Completing training session %s", session_id)
-    session = db.get(TrainingSession, session_id)
+    # Only what the analysis needs; the transcript and analysis about to be
+    # replaced are not read.
+    session = (
+        await db.execute(
+            select(TrainingSession.user_id, TrainingSession.session_system_prompt).where(
+                TrainingSession.id == session_id
+            )
+        )
+    ).first()
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     if session.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this session")
+    # Do not hold the read transaction (and its pooled connection) open while the
+    # analysis runs; the result is written by _store_completion.
+    await db.close()
+
+    values: Dict[str, Any] = {
+        "conversation_log": payload.conversation_log,
+        "session_end": datetime.now(timezone.utc).replace(tzinfo=None),
+        "status": "completed",
+    }
+
+    if defer_analysis and settings.analysis_batch_enabled:
+        values["status"] = ANALYZING_STATUS
+        response = await _store_completion(db, session_id, values)
+        logger.info("Queued session %s for batch analysis", session_id)
+        return _json_response(response)
+
+    if background:
+        values["status"] = PROCESSING_STATUS
+        response = await _store_completion(db, session_id, values)
+        background_tasks.add_task(
+            _analyse_in_background,
+            session_id,
+            payload.conversation_log,
+            session.session_system_prompt or "",
+        )
+        logger.info("Analysing session %s in the background", session_id)
+        return _json_response(response, status_code=status.HTTP_202_ACCEPTED)
 
-    session.conversation_log = payload.conversation_log
-    session.session_end = datetime.now(timezone.utc)
-    session.status = "completed"
+    values.update(
+        await _analysis_values(
+            session_id, payload.conversation_log, session.session_system_prompt or ""
+        )
+    )
+    return _json_response(await _store_completion(db, session_id, values))
 
-    try:
-        openai_client = get_openai_client()
-        analysis, raw_payload = analyse_conversation(
-            client=openai_client,
-            conversation_log=payload.conversation_log,
-            session_system_prompt=session.session_system_prompt or "",
+
+@router.post("/reanalyze", response_model=dict)
+async def reanalyze_sessions(
+    payload: ReanalyzeSessionsRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Run the analysis again for several of the current user's sessions.
+
+    Sessions without a transcript are skipped. A failed analysis leaves the stored
+    one untouched and its id is reported in `failed_ids`.
+    """
+    logger.info("Re-analysing %d sessions for user %s", len(payload.session_ids), current_user.id)
+    sessions = (
+        await db.execute(
+            select(
+                TrainingSession.id,
+                TrainingSession.conversation_log,
+                TrainingSession.session_system_prompt,
+            ).where(
+                TrainingSession.id.in_(payload.session_ids),
+                TrainingSession.user_id == current_user.id,
+                TrainingSession.conversation_log.is_not(None),
+            )
         )
+    ).all()
+    # Release the connection while OpenAI works.
+    await db.close()
+
+    client = get_openai_client()
+    semaphore = asyncio.Semaphore(REANALYZE_CONCURRENCY)
+
+    async def analyse(session: Any) -> Dict[str, Any] | None:
+        async with semaphore:
+            try:
+                analysis, raw_payload = await analyse_conversation(
+                    client=client,
+                    conversation_log=session.conversation_log,
+                    session_system_prompt=session.session_system_prompt or "",
+                    use_cache=False,
+                )
+            except Exception:
+                logger.exception("Failed to re-analyse session %s", session.id)
+                return None
+        return {
+            "id": session.id,
+            "ai_analysis": raw_payload,
+            "score": analysis.score,
+            "feedback": analysis.specific_feedback,
+            "status": "completed",
+        }
 
-        session.ai_analysis = raw_payload
-        session.score = analysis.score
-        session.feedback = analysis.specific_feedback
-    except Exception as exc:
-        logger.exception("Failed to analyze conversation for session %s", session_id)
-        # Store error in analysis field but don't fail the request
-        session.ai_analysis = f"Analysis failed: {str(exc)}"
-        session.score = None
-        session.feedback = "Analysis service unavailable. Please try again later."
+    results = await asyncio.gather(*(analyse(session) for session in sessions))
+    rows = [row for row in results if row is not None]
+    if rows:
+        # Bulk UPDATE by primary key: one executemany in a single transaction.
+        async with db.begin():
+            await db.execute(update(TrainingSession), rows)
+        forget_counts(current_user.id)
+
+    return {
+        "reanalyzed_ids": [row["id"] for row in rows],
+        "failed_ids": [session.id for session, row in zip(sessions, results) if row is None],
+    }
+
+
+def _sse_event(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+@router.post("/{session_id}/complete/stream")
+async def complete_session_stream(
+    session_id: int,
+    payload: CompleteSessionRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Same as `/complete`, but streams the analysis as Server-Sent Events.
 
-    db.add(session)
-    db.commit()
-    db.refresh(session)
-    return session
+    Emits a `field` event (`{"field": ..., "value": ...}`) for each analysis field as
+    soon as it is ready, then a final `session` event with the stored session.
 
+    The transcript is stored (status `processing`) before streaming starts. If the
+    client disconnects, the analysis is finished and stored in the background.
+    """
+    logger.info("Completing training session %s (streaming analysis)", session_id)
+    # Only what the analysis needs; the transcript and analysis about to be
+    # replaced are not read.
+    session = (
+        await db.execute(
+            select(TrainingSession.user_id, TrainingSession.session_system_prompt).where(
+                TrainingSession.id == session_id
+            )
+        )
+    ).first()
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    if session.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this session")
+    # Do not hold the read transaction (and its pooled connection) open while the
+    # analysis runs; the result is written by _store_completion.
+    await db.close()
+
+    # The transcript must survive a dropped stream, so it is written up front.
+    await _store_completion(
+        db,
+        session_id,
+        {
+            "conversation_log": payload.conversation_log,
+            "session_end": datetime.now(timezone.utc).replace(tzinfo=None),
+            "status": PROCESSING_STATUS,
+        },
+    )
+    session_system_prompt = session.session_system_prompt or ""
+
+    async def events() -> AsyncIterator[bytes]:
+        values: Dict[str, Any] = {"status": "completed"}
+        stored = False
+        try:
+            try:
+                async for field, value in analyse_conversation_stream(
+                    client=get_openai_client(),
+                    conversation_log=payload.conversation_log,
+                    session_system_prompt=session_system_prompt,
+                ):
+                    if field == "analysis":
+                        analysis, raw_payload = value
+                        values["ai_analysis"] = raw_payload
+                        values["score"] = analysis.score
+                        values["feedback"] = analysis.specific_feedback
+                    else:
+                        yield _sse_event("field", {"field": field, "value": value})
+            except Exception as exc:
+                logger.exception("Failed to analyze conversation for session %s", session_id)
+                values["ai_analysis"] = f"Analysis failed: {str(exc)}"
+                values["score"] = None
+                values["feedback"] = "Analysis service unavailable. Please try again later."
+
+            response = await _store_completion(db, session_id, values)
+            stored = True
+            yield _sse_event("session", response.model_dump(mode="json"))
+        finally:
+            if not stored:
+                # The client went away (disconnect, proxy timeout) and cancelled the
+                # stream: finish outside the request so the session is not left
+                # `processing`.
+                logger.info("Stream for session %s dropped; completing in the background", session_id)
+                if "ai_analysis" in values:
+                    _detach_completion(_store_in_background(session_id, values))
+                else:
+                    _detach_completion(
+                        _analyse_in_background(
+                            session_id, payload.conversation_log, session_system_prompt
+                        )
+                    )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies must pass each event through as it is written.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
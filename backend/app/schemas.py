@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TrainerSettings(BaseModel):
@@ -57,14 +57,37 @@ class TrainingSessionResponse(BaseModel):
     signed_ws_url: Optional[str] = None
     conversation_id: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TrainingSessionSummary(BaseModel):
+    """A history list entry: TrainingSessionResponse without the large text fields."""
+
+    id: int
+    user_id: int
+    manager_name: str
+    session_start: datetime
+    session_end: Optional[datetime]
+    score: Optional[float]
+    feedback: Optional[str]
+    status: str
+    client_description: Optional[str] = None
+    difficulty_level: Optional[str] = None
+    client_type: Optional[str] = None
+    first_message: Optional[str] = None
+    conversation_id: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CompleteSessionRequest(BaseModel):
     conversation_log: str
 
 
+class ReanalyzeSessionsRequest(BaseModel):
+    session_ids: list[int] = Field(min_length=1, max_length=500)
+
+
 class ConversationAnalysis(BaseModel):
     score: float
     strengths: list[str]
@@ -92,8 +115,7 @@ class UserResponse(BaseModel):
     username: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LoginRequest(BaseModel):
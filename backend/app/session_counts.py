@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Optional, Tuple
+
+
+# (user id, manager_name, status) -> (deadline, count). The history page asks for
+# the count on every filter change; writes by the same user drop their entries.
+COUNT_CACHE_TTL_SECONDS = 30.0
+COUNT_CACHE_MAX_ENTRIES = 10_000
+_count_cache: Dict[Tuple[int, Optional[str], Optional[str]], Tuple[float, int]] = {}
+
+
+def cached_count(key: Tuple[int, Optional[str], Optional[str]]) -> Optional[int]:
+    entry = _count_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() >= entry[0]:
+        del _count_cache[key]
+        return None
+    return entry[1]
+
+
+def remember_count(key: Tuple[int, Optional[str], Optional[str]], count: int) -> None:
+    now = time.monotonic()
+    _count_cache.pop(key, None)
+    if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+        for stale in [k for k, (deadline, _) in _count_cache.items() if deadline <= now]:
+            del _count_cache[stale]
+        if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            # Still full of live entries: forget the oldest filter.
+            del _count_cache[next(iter(_count_cache))]
+    _count_cache[key] = (now + COUNT_CACHE_TTL_SECONDS, count)
+
+
+def forget_counts(user_id: int) -> None:
+    for key in [key for key in _count_cache if key[0] == user_id]:
+        del _count_cache[key]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+# The only place .env is read; every module takes its configuration from `settings`.
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Settings:
+    openai_model: str
+    elevenlabs_api_key: str | None
+    elevenlabs_agent_id: str | None
+    elevenlabs_voice_id: str | None
+    elevenlabs_signed_url_pool_size: int
+    db_dir: str
+    database_url: str
+    auto_create_tables: bool
+    auth_secret_key: str
+    cors_origins: tuple[str, ...]
+    cors_origin_regex: str | None
+    analysis_batch_enabled: bool
+    analysis_batch_poll_interval: float
+    analysis_cache_ttl_seconds: int
+    analysis_coalesce_max_batch: int
+    analysis_max_completion_tokens: int
+    history_log_sample_rate: float
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        db_dir = os.getenv("DB_DIR", "/app/data")
+        cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173")
+        return cls(
+            openai_model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            elevenlabs_api_key=os.getenv("ELEVENLABS_API_KEY"),
+            elevenlabs_agent_id=os.getenv("ELEVENLABS_AGENT_ID"),
+            elevenlabs_voice_id=os.getenv("ELEVENLABS_VOICE_ID"),
+            elevenlabs_signed_url_pool_size=int(os.getenv("ELEVENLABS_SIGNED_URL_POOL_SIZE", "2")),
+            db_dir=db_dir,
+            database_url=os.getenv("DATABASE_URL", f"sqlite:///{db_dir}/sales_training.db"),
+            auto_create_tables=os.getenv("AUTO_CREATE_TABLES", "1") == "1",
+            auth_secret_key=os.getenv("AUTH_SECRET_KEY", "secret"),
+            cors_origins=tuple(
+                origin.strip() for origin in cors_origins.split(",") if origin.strip()
+            ),
+            cors_origin_regex=os.getenv(
+                "CORS_ORIGIN_REGEX", r"https?://(localhost|127\.0\.0\.1)(:[0-9]+)?"
+            ) or None,
+            analysis_batch_enabled=os.getenv("ANALYSIS_BATCH_ENABLED", "0") == "1",
+            analysis_batch_poll_interval=float(os.getenv("ANALYSIS_BATCH_POLL_INTERVAL", "60")),
+            analysis_cache_ttl_seconds=int(
+                os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+            ),
+            analysis_coalesce_max_batch=int(os.getenv("ANALYSIS_COALESCE_MAX_BATCH", "1")),
+            analysis_max_completion_tokens=int(os.getenv("ANALYSIS_MAX_COMPLETION_TOKENS", "1000")),
+            history_log_sample_rate=float(os.getenv("HISTORY_LOG_SAMPLE_RATE", "0.01")),
+        )
+
+
+settings = Settings.from_env()
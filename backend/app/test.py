@@ -1,20 +1,22 @@
 from elevenlabs import ElevenLabs
 from dotenv import load_dotenv
 import os
+from urllib.parse import parse_qs, urlsplit
 
 load_dotenv()
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+# One client (and its connection pool) for every call.
+_CLIENT = ElevenLabs(api_key=ELEVENLABS_API_KEY)
 
 
 def request_signed_ws_url(*, agent_id: str):
-    client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
-    response = client.conversational_ai.conversations.get_signed_url(
+    response = _CLIENT.conversational_ai.conversations.get_signed_url(
         agent_id=agent_id,
         include_conversation_id=True,
     )
 
     signed_url = response.signed_url
-    conversation_id = signed_url[signed_url.find("conversation_id=")+len("conversation_id="):]
+    conversation_id = parse_qs(urlsplit(signed_url).query).get("conversation_id", [""])[0]
     
     # if not signed_url or not conversation_id:
     #     print("Signed URL or conversation ID missing from ElevenLabs response")
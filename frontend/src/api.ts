@@ -5,6 +5,7 @@ import type {
   StartSessionResult,
   TokenResponse,
   TrainingSession,
+  TrainingSessionSummary,
   User
 } from "./types";
 
@@ -78,7 +79,7 @@ export function fetchSessionHistory(filters?: SessionHistoryFilters) {
   if (filters?.sort_order) params.append("sort_order", filters.sort_order);
 
   const queryString = params.toString();
-  return request<TrainingSession[]>(`/api/sessions${queryString ? `?${queryString}` : ""}`);
+  return request<TrainingSessionSummary[]>(`/api/sessions${queryString ? `?${queryString}` : ""}`);
 }
 
 export function fetchSessionHistoryCount(filters?: Pick<SessionHistoryFilters, "manager_name" | "status">) {
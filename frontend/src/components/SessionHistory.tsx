@@ -1,9 +1,14 @@
 import { useEffect, useState, useCallback } from "react";
-import { fetchSessionHistory, fetchSessionHistoryCount, type SessionHistoryFilters } from "../api";
-import type { TrainingSession } from "../types";
+import {
+  fetchSessionHistory,
+  fetchSessionHistoryCount,
+  fetchTrainingSession,
+  type SessionHistoryFilters
+} from "../api";
+import type { TrainingSession, TrainingSessionSummary } from "../types";
 
 export function SessionHistory() {
-  const [sessionHistory, setSessionHistory] = useState<TrainingSession[]>([]);
+  const [sessionHistory, setSessionHistory] = useState<TrainingSessionSummary[]>([]);
   const [historyFilters, setHistoryFilters] = useState<SessionHistoryFilters>({
     limit: 10,
     offset: 0,
@@ -40,6 +45,21 @@ export function SessionHistory() {
     loadSessionHistory();
   }, [loadSessionHistory]);
 
+  // The list carries summaries only; the transcript and analysis are loaded on selection.
+  const handleSelectSession = async (sessionId: number) => {
+    if (sessionId === selectedHistorySession?.id) {
+      setSelectedHistorySession(null);
+      return;
+    }
+    setError(null);
+    try {
+      setSelectedHistorySession(await fetchTrainingSession(sessionId));
+    } catch (err) {
+      console.error("Failed to load session:", err);
+      setError(err instanceof Error ? err.message : "Failed to load session");
+    }
+  };
+
   const handleFilterChange = (updates: Partial<SessionHistoryFilters>) => {
     setHistoryFilters(prev => ({ ...prev, ...updates, offset: 0 }));
   };
@@ -118,7 +138,7 @@ export function SessionHistory() {
               <div
                 key={session.id}
                 className={`session-item ${selectedHistorySession?.id === session.id ? "selected" : ""}`}
-                onClick={() => setSelectedHistorySession(session.id === selectedHistorySession?.id ? null : session)}
+                onClick={() => handleSelectSession(session.id)}
               >
                 <div className="session-item-header">
                   <div className="session-item-meta">
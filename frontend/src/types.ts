@@ -21,6 +21,11 @@ export interface TrainingSession {
   conversation_id: string | null;
 }
 
+export type TrainingSessionSummary = Omit<
+  TrainingSession,
+  "conversation_log" | "ai_analysis" | "session_system_prompt" | "signed_ws_url"
+>;
+
 export interface StartSessionForm {
   manager_name: string;
   client_description: string;